@@ -51,6 +51,14 @@ MAX_BATCH_SIZE = int(TPM_LIMIT / LARGEST_DESCRIPTION_IN_TOKENS)     # the calcul
 
 # EMBEDDING FUNCTION DEFINITION ----------------------------------------------------------------------------------------------------------------------------------------------------
 
+# sends one batch of descriptions to text-embedding-3-large and returns their embeddings in the same order (used by both embed_data.py and pipeline.py)
+def embed_descriptions(client, descriptions: list[str]) -> list[list[float]]:
+    embeddings = client.embeddings.create(
+        model = "text-embedding-3-large",
+        input = descriptions
+    )
+    return [embedding.embedding for embedding in embeddings.data]
+
 # interacts with OpenAI to retrieve embeddings for all jobs and store them in a jsonl file
 def embed_all(jobs, batch_size: int = MAX_BATCH_SIZE):
     # creates the client using my API key
@@ -84,24 +92,21 @@ def embed_all(jobs, batch_size: int = MAX_BATCH_SIZE):
 
             try:
                 # create the embeddings for all descriptions in the batch
-                embeddings = client.embeddings.create(
-                    model = "text-embedding-3-large",
-                    input = description_batch
-                )
+                embeddings = embed_descriptions(client, description_batch)
             except Exception as e:
                 print(f"Error in batch starting at job {i}: {e}")
                 time.sleep(60)  # a minute long sleep to ensure that, in the case of unexpected errors, TPM limit is still respected
                 continue
 
             # for each each embedding and its associated job, construct a json object
-            for embedding, job in zip(embeddings.data, job_batch):
+            for embedding, job in zip(embeddings, job_batch):
 
                 job_data = {
                     'title': job['title'],
                     'company': job['company'],
                     'location': job['location'],
                     'full_description': job['full_description'],
-                    'embedding': embedding.embedding
+                    'embedding': embedding
                 }
 
                 # dump the json object to the jsonl file and add it to the in_file set
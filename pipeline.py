@@ -0,0 +1,436 @@
+# OVERVIEW ========================================================================================================================================================================
+'''
+pipeline.py connects scraping, embedding, and storing into a single pipelined run. Instead of scraper.py writing a complete jobs.jsonl, embed_data.py re-reading it, and
+resume_comparison.py reading everything again, each job retrieved by scraper.py's retrieve_job() is immediately handed to the embedding batcher and then appended to
+job_data/jobs_embeddings.jsonl (the file resume_comparison.py searches).
+
+The three stages run on their own threads and are connected by bounded queues, so a slow stage (usually embedding, which has to respect OpenAI's rate limits) makes the
+stages in front of it wait instead of letting scraped jobs pile up in memory:
+
+    scrape  --[scraped queue]-->  embed (batches of up to MAX_BATCH_SIZE)  --[embedded queue]-->  index
+
+Every scraped job is appended to job_data/pipeline_scraped_jobs.jsonl (the pipeline's own untracked scrape log, so the job_data/jobs.jsonl dataset is never changed) as
+soon as it is retrieved and every embedded job is appended to job_data/jobs_embeddings.jsonl as soon as its batch returns. If the program crashes or is stopped, simply run
+it again: jobs that were already embedded are skipped, job cards whose title and company are already known are skipped without being clicked, and jobs from the scrape log
+that never got an embedding are embedded while scraping resumes. Only jobs scraped by pipeline.py itself are ever picked up again this way, so the first run starts with
+nothing to catch up on (the jobs in job_data/jobs.jsonl can still be embedded with embed_data.py).
+
+While running, the number of jobs each stage has handled, its throughput, and how full each queue is are printed every --report-interval seconds, and once more at the end.
+
+To use pipeline.py, follow the OpenAI API key setup described in the README and run it from the project directory as follows (logging in to Indeed works just like scraper.py):
+
+python pipeline.py
+OR
+python3 pipeline.py
+
+Please see scraper.py's disclaimer about Indeed's terms of service before running this program. run_pipeline() takes any scrape function (which is given a known(title, company)
+function and a stop event, and returns an iterable of Job objects) and any embedder function (a list of descriptions in, a list of embeddings out), so it can also be run on
+jobs that did not come from Indeed or with an embedding model other than OpenAI's. tests/test_pipeline.py runs it on saved Indeed pages with a fake embedder.
+'''
+# =================================================================================================================================================================================
+
+
+
+
+
+# IMPORTS -------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+from openai import OpenAI                   # for interacting with OpenAI through their API
+import threading, queue                     # for running each stage on its own thread and connecting them with bounded queues
+import time                                 # for throughput reporting and sleeping to avoid rate limits
+import json                                 # for manipulating json files
+import os                                   # for checking whether the checkpoint files exist and forcing writes to disk
+import argparse                             # for taking pipeline settings as command-line arguments
+
+import scraper                                                          # for driving the browser and retrieving jobs (scrape_jobs() yields each job as it is scraped)
+from embedding.embed_data import embed_descriptions, MAX_BATCH_SIZE     # for getting embeddings from text-embedding-3-large while staying under the TPM limit
+from job.job_module import Job, EmbeddedJob                             # for passing jobs between stages
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# CONSTANT DEFINITIONS ------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+SCRAPED_PATH = "job_data/pipeline_scraped_jobs.jsonl"   # every scraped job is appended here (also used to find jobs that still need embeddings after a crash)
+EMBEDDINGS_PATH = "job_data/jobs_embeddings.jsonl"      # every embedded job is appended here (the file resume_comparison.py searches)
+
+QUEUE_SIZE = 2 * MAX_BATCH_SIZE     # the most jobs that can wait between two stages before the stage in front of them has to wait
+BATCH_WAIT = 30                     # seconds the embedding stage waits for a batch to fill before sending a partial one (scraping is much slower than embedding)
+BATCH_DELAY = 60                    # the minimum number of seconds between two embedding requests (TPM limits, same as embed_data.py)
+REPORT_INTERVAL = 60                # seconds between throughput reports
+
+DONE = None     # placed on a queue by a stage once it has no more jobs to pass on
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# STAGE STATISTICS ----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# a StageStats class for keeping track of how many jobs a stage has handled and how quickly
+class StageStats:
+
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.errors = 0
+        self.start_time = time.monotonic()
+        self.end_time = None
+        self.lock = threading.Lock()    # stages update their stats while the reporter reads them
+
+    # adds num handled jobs to the stage's count
+    def add(self, num: int = 1) -> None:
+        with self.lock:
+            self.count += num
+
+    # adds num failed jobs to the stage's error count
+    def add_errors(self, num: int = 1) -> None:
+        with self.lock:
+            self.errors += num
+
+    # marks the stage as finished so its throughput stops decreasing while other stages are still running
+    def finish(self) -> None:
+        self.end_time = time.monotonic()
+
+    # returns the number of jobs handled per second since the stage started
+    def throughput(self) -> float:
+        elapsed = (self.end_time or time.monotonic()) - self.start_time
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    # prints the stage's progress in a <name>: <count> jobs ... format
+    def __str__(self):
+        with self.lock:
+            ret_str = f"{self.name}: {self.count} jobs ({self.throughput():.3f} jobs/s)"
+            if self.errors:
+                ret_str += f", {self.errors} failed"
+            if self.end_time:
+                ret_str += ", finished"
+            return ret_str
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# CHECKPOINT FUNCTIONS ------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# creates a unique key for a job by combining the title and company (same key as embed_data.py)
+def job_key(job) -> str:
+    return f"{job.title} -=- {job.company}"
+
+# yields every json object in a jsonl file, skipping lines that cannot be read (e.g. a line that was only half written when the program crashed)
+def read_jsonl(filename: str):
+    if not os.path.exists(filename):
+        return
+
+    with open(filename, "r", encoding = "utf-8") as fin:
+        for line in fin:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except Exception as e:
+                print(f"Error trying to retrieve line in {filename}: {e}")
+
+# opens a jsonl file for appending, first removing any half written last line so it cannot break other programs reading the file (e.g. resume_comparison.py)
+def open_jsonl_for_append(filename: str):
+    if os.path.exists(filename) and os.path.getsize(filename) > 0:
+        with open(filename, "rb+") as f:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                # walk back in chunks to find the last newline and cut everything after it (or the whole file if there is none)
+                end = f.tell()
+                position = end
+                while position > 0:
+                    chunk_start = max(0, position - 65536)
+                    f.seek(chunk_start)
+                    newline = f.read(position - chunk_start).rfind(b"\n")
+                    if newline != -1:
+                        position = chunk_start + newline + 1
+                        break
+                    position = chunk_start
+                print(f"Removing half written line at the end of {filename} ({end - position} bytes).")
+                f.truncate(position)
+
+    return open(filename, "a", encoding = "utf-8")
+
+# writes a single json object to a jsonl file and makes sure it has reached the disk before the job moves on to the next stage
+def append_jsonl(fout, data: dict) -> None:
+    json.dump(data, fout)
+    fout.write("\n")
+    fout.flush()
+    os.fsync(fout.fileno())
+
+# reads the checkpoint files and returns the keys of all jobs seen so far as well as the jobs that were scraped in a previous run but never embedded
+def load_checkpoint(scraped_path: str, embeddings_path: str) -> tuple[set[str], list[Job]]:
+    embedded = {f"{job['title']} -=- {job['company']}" for job in read_jsonl(embeddings_path)}
+
+    seen = set(embedded)    # stores the keys of all jobs that have already been scraped or embedded so they are never scraped twice
+    pending = []            # stores the jobs that were scraped but are missing from the embeddings file
+
+    for job in read_jsonl(scraped_path):
+        job = Job(job['title'], job['company'], job['location'], job['full_description'])
+        if job_key(job) not in seen:
+            seen.add(job_key(job))
+            pending.append(job)
+
+    return seen, pending
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# STAGE FUNCTIONS -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# sends every newly scraped job to the embedding stage (waits whenever the scraped queue is full)
+def scrape_stage(scrape, seen: set[str], scraped_path: str, out_queue: queue.Queue, stats: StageStats, stop: threading.Event) -> None:
+    try:
+        with open_jsonl_for_append(scraped_path) as fout:
+            # the scraper can skip job cards that are already known before clicking them (the title and company check below still catches the rest)
+            for job in scrape(lambda title, company: f"{title} -=- {company}" in seen, stop):
+                if stop.is_set():
+                    break
+
+                # skip jobs that were already scraped in this or a previous run
+                if job_key(job) in seen:
+                    continue
+                seen.add(job_key(job))
+
+                # record the job before passing it on so it can be embedded on the next run if the program stops before it is embedded
+                append_jsonl(fout, job.__dict__)
+                stats.add()
+                out_queue.put(job)
+
+    # the jobs already scraped are still embedded and stored, so the other stages are not stopped (they finish once they reach DONE)
+    except Exception as e:
+        print(f"Error in scrape stage: {e}")
+
+    finally:
+        stats.finish()
+        out_queue.put(DONE)
+
+# groups the pending jobs from a previous run and then newly scraped jobs into batches of up to batch_size, gets their embeddings, and sends them to the index stage
+# (waits whenever the embedded queue is full) -- pending jobs are taken here rather than queued by the scrape stage so scraping does not wait for them to be embedded
+def embed_stage(embedder, pending: list[Job], in_queue: queue.Queue, out_queue: queue.Queue, stats: StageStats, stop: threading.Event,
+                batch_size: int = MAX_BATCH_SIZE, batch_wait: float = BATCH_WAIT, batch_delay: float = BATCH_DELAY) -> None:
+    last_request = None     # the time of the last embedding request, used to keep batch_delay seconds between requests
+    finished = False
+    pending = list(reversed(pending))   # reversed so pop() takes the pending jobs in the order they were scraped
+
+    try:
+        while not finished:
+            job_batch = []
+
+            # fill the batch with pending jobs first
+            while pending and len(job_batch) < batch_size:
+                job_batch.append(pending.pop())
+
+            # then until it is full, no job has arrived for batch_wait seconds, or the scrape stage is done
+            while len(job_batch) < batch_size:
+                try:
+                    job = in_queue.get(timeout = batch_wait)
+                except queue.Empty:
+                    if job_batch:
+                        break
+                    continue
+
+                if job is DONE:
+                    finished = True
+                    break
+                job_batch.append(job)
+
+            if not job_batch:
+                continue
+
+            # sleep for whatever is left of batch_delay since the last request (TPM limits), waking up early if the pipeline is stopping
+            if last_request is not None:
+                stop.wait(max(0, batch_delay - (time.monotonic() - last_request)))
+
+            # if the index stage has failed (or Ctrl-C was pressed), stop before paying for embeddings that would never be stored (the jobs are still in the scrape log for the next run)
+            if stop.is_set():
+                break
+            last_request = time.monotonic()
+
+            try:
+                # create the embeddings for all descriptions in the batch
+                embeddings = embedder([job.full_description for job in job_batch])
+            except Exception as e:
+                # the jobs in the failed batch are still in the scrape log, so they will be embedded the next time the pipeline is run
+                print(f"Error embedding batch of {len(job_batch)} jobs: {e}")
+                stats.add_errors(len(job_batch))
+                continue
+
+            # a batch missing any embeddings is treated as failed so no job is counted as embedded without actually being stored
+            if len(embeddings) != len(job_batch):
+                print(f"Error embedding batch of {len(job_batch)} jobs: received {len(embeddings)} embeddings")
+                stats.add_errors(len(job_batch))
+                continue
+
+            for embedding, job in zip(embeddings, job_batch):
+                out_queue.put(EmbeddedJob(job.title, job.company, job.location, job.full_description, embedding))
+            stats.add(len(job_batch))
+
+    except Exception as e:
+        print(f"Error in embed stage: {e}")
+        stop.set()
+
+    finally:
+        # keep the scrape stage from waiting forever on a full queue if this stage stopped early
+        if not finished:
+            while in_queue.get() is not DONE:
+                pass
+        stats.finish()
+        out_queue.put(DONE)
+
+# appends every embedded job to the embeddings file (where it can be searched as soon as it arrives) and passes it to on_index if one is given
+def index_stage(embeddings_path: str, in_queue: queue.Queue, on_index, stats: StageStats, stop: threading.Event) -> None:
+    finished = False
+
+    try:
+        with open_jsonl_for_append(embeddings_path) as fout:
+            while True:
+                job = in_queue.get()
+                if job is DONE:
+                    finished = True
+                    break
+
+                # cosine_distance is only meaningful once a resume is compared, so it is left out like in embed_data.py
+                job_data = {
+                    'title': job.title,
+                    'company': job.company,
+                    'location': job.location,
+                    'full_description': job.full_description,
+                    'embedding': job.embedding
+                }
+
+                append_jsonl(fout, job_data)
+                if on_index is not None:
+                    on_index(job)
+                stats.add()
+
+    except Exception as e:
+        print(f"Error in index stage: {e}")
+        stop.set()
+
+    finally:
+        # keep the embed stage from waiting forever on a full queue if this stage stopped early
+        if not finished:
+            while in_queue.get() is not DONE:
+                pass
+        stats.finish()
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# PIPELINE FUNCTION DEFINITION ----------------------------------------------------------------------------------------------------------------------------------------------------
+
+# returns the number of jobs waiting in a queue (qsize() would also count DONE once the stage in front of it has finished)
+def num_waiting(q: queue.Queue) -> int:
+    with q.mutex:
+        return sum(1 for job in q.queue if job is not DONE)
+
+# prints the progress of every stage and how full each queue is
+def report(all_stats: list[StageStats], queues: dict[str, queue.Queue]) -> None:
+    print(" | ".join(str(stats) for stats in all_stats) + " | " + ", ".join(f"{name} queue: {num_waiting(q)}/{q.maxsize}" for name, q in queues.items()))
+
+# runs jobs through the scrape, embed, and index stages at the same time and returns the number of jobs embedded during this run
+# on_index(job) is called with each EmbeddedJob once it is stored (the jobs themselves are not kept, since each embedding is thousands of floats)
+def run_pipeline(scrape, embedder, scraped_path: str = SCRAPED_PATH, embeddings_path: str = EMBEDDINGS_PATH, queue_size: int = QUEUE_SIZE, batch_size: int = MAX_BATCH_SIZE,
+                 batch_wait: float = BATCH_WAIT, batch_delay: float = BATCH_DELAY, report_interval: float = REPORT_INTERVAL, on_index = None) -> int:
+    seen, pending = load_checkpoint(scraped_path, embeddings_path)
+    if pending:
+        print(f"Resuming: {len(pending)} previously scraped jobs still need embeddings.")
+
+    scraped_queue = queue.Queue(maxsize = queue_size)
+    embedded_queue = queue.Queue(maxsize = queue_size)
+    stop = threading.Event()    # set when the embed or index stage fails (or by Ctrl-C) so the other stages stop early
+
+    scrape_stats, embed_stats, index_stats = StageStats("scrape"), StageStats("embed"), StageStats("index")
+
+    threads = [
+        threading.Thread(target = scrape_stage, args = (scrape, seen, scraped_path, scraped_queue, scrape_stats, stop), name = "scrape"),
+        threading.Thread(target = embed_stage, args = (embedder, pending, scraped_queue, embedded_queue, embed_stats, stop, batch_size, batch_wait, batch_delay), name = "embed"),
+        threading.Thread(target = index_stage, args = (embeddings_path, embedded_queue, on_index, index_stats, stop), name = "index")
+    ]
+
+    # daemon threads so that pressing Ctrl-C a second time exits right away instead of waiting on the stages
+    for thread in threads:
+        thread.daemon = True
+
+    for thread in threads:
+        thread.start()
+
+    # report throughput every report_interval seconds until the last stage is done (the final report is printed once every stage has finished)
+    try:
+        while threads[-1].is_alive():
+            threads[-1].join(timeout = report_interval)
+            if threads[-1].is_alive():
+                report([scrape_stats, embed_stats, index_stats], {"scraped": scraped_queue, "embedded": embedded_queue})
+
+    # Ctrl-C only reaches the main thread, so tell the stages to stop and wait for them to store what they already have (before the caller quits the driver)
+    except KeyboardInterrupt:
+        print("Stopping pipeline (press Ctrl-C again to exit immediately)...")
+        stop.set()
+
+    for thread in threads:
+        thread.join()
+
+    report([scrape_stats, embed_stats, index_stats], {"scraped": scraped_queue, "embedded": embedded_queue})
+
+    return index_stats.count
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# MAIN ============================================================================================================================================================================
+
+if __name__ == "__main__":
+
+# Take command-line arguments for pipeline settings -------------------------------------------------------------------------------------------------------------------------------
+
+    parser = argparse.ArgumentParser()
+
+    # optional arguments
+    parser.add_argument("--batch-size", help = f"Enter the most jobs sent in one embedding request (default: {MAX_BATCH_SIZE})", dest = 'batch_size', type = int, default = MAX_BATCH_SIZE)
+    parser.add_argument("--queue-size", help = f"Enter the most jobs that can wait between two stages (default: {QUEUE_SIZE})", dest = 'queue_size', type = int, default = QUEUE_SIZE)
+    parser.add_argument("--max-pages", help = f"Enter the most result pages to scrape (default: {scraper.MAX_PAGES})", dest = 'max_pages', type = int, default = scraper.MAX_PAGES)
+    parser.add_argument("--report-interval", help = f"Enter the seconds between throughput reports (default: {REPORT_INTERVAL})", dest = 'report_interval', type = float, default = REPORT_INTERVAL)
+
+    args = parser.parse_args()
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    client = OpenAI()   # creates the client using my API key
+
+    driver = scraper.start_driver()
+    scraper.log_in(driver)
+
+    try:
+        num_indexed = run_pipeline(
+            lambda known, stop: scraper.scrape_jobs(driver, args.max_pages, known, stop),
+            lambda descriptions: embed_descriptions(client, descriptions),
+            queue_size = args.queue_size,
+            batch_size = args.batch_size,
+            report_interval = args.report_interval
+        )
+    finally:
+        driver.quit()
+
+    print(f"Finished pipeline. {num_indexed} new jobs were added to {EMBEDDINGS_PATH}.")
+
+# END MAIN ========================================================================================================================================================================
@@ -87,32 +87,87 @@ def retrieve_job(driver) -> Job:
 
         return Job(title, company, location, full_description)
 
-# -----------------------------------------------------------------------------------------------------------------------------------------------------------------------
+# retrieves the title and company shown on a job card without clicking it -- returns None if either can't be found
+def retrieve_card_title_company(card) -> tuple[str, str] | None:
+    try:
+        title = card.find_element(By.XPATH, ".//h2//span").text
+        company = card.find_element(By.XPATH, ".//*[@data-testid='company-name']").text
+        return title, company
+    except:
+        return None
 
+# clicks through every job card on up to max_pages result pages and yields each job as soon as it is retrieved (used by both scraper.py and pipeline.py)
+# known(title, company) can be given to skip cards for jobs that have already been scraped without clicking them, and stop (a threading.Event) to stop scraping early
+def scrape_jobs(driver, max_pages: int = MAX_PAGES, known = None, stop = None):
+    job_count = 0       # counts number of jobs scraped for debugging purposes
+    seen = set()        # maintains a set of all jobs that have been seen in case duplicates are loaded
 
+    # go through a maximum of max_pages to ensure non-infinite scraping and that the program will eventually stop if there is a bug
+    for page in range(max_pages):
 
+        if stop is not None and stop.is_set():
+            break
 
+        try:
+            # wait for all cards on the screen to load (max 10 seconds), then store them all in cards
+            cards = WebDriverWait(driver, 10).until(expected_conditions.presence_of_all_elements_located((By.CLASS_NAME, "resultContent")))
 
-# MAIN ===================================================================================================================================================================
+            for card in cards:
 
-if __name__ == "__main__":
+                if stop is not None and stop.is_set():
+                    return
 
-# INITIALIZE DRIVER ------------------------------------------------------------------------------------------------------------------------------------------------------
+                # ensure card has not already been seen -- if it has, continue, if not, add it to seen
+                card_text = card.text
+                if card_text in seen:
+                    continue
+                seen.add(card_text)
 
-    options = undetected_chromedriver.ChromeOptions()               # sets the options undetected-chromedriver will start with
+                # skip cards for jobs that were already scraped (e.g. before a crash) without clicking them or sleeping
+                if known is not None:
+                    title_company = retrieve_card_title_company(card)
+                    if title_company is not None and known(*title_company):
+                        continue
 
-    options.add_argument("--window-size=1960,1080")                 # makes automation harder to detect (apparently)
+                try:
+                    # load the job data by clicking the card and sleep to allow the content to load
+                    card.click()
+                    small_sleep()
 
-    driver = undetected_chromedriver.Chrome(options=options)        # creates the driver which will be used to browse the web
+                    # retrieve the job from the card and hand it to the caller before moving on to the next card
+                    job = retrieve_job(driver)
+                    job_count += 1      # track number of jobs for debugging
 
-# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------
+                except Exception as e:
+                    print(f"Failed on page {page}, job {job_count}. Skipped job.")
+                    print(f"Error: {e}")
+                    continue
 
+                yield job
 
+            # if the next_page element exists and is enabled, go to the next page, else there are no more pages -> break out of loop
+            next_page = driver.find_element(By.XPATH, "//*[contains(@data-testid, 'pagination-page-next')]")
+            if next_page and next_page.is_enabled():
+                next_page.click()
+                sleep()     # moderate sleep to allow site to load and lessen site traffic
+            else:
+                break
 
+        except Exception as e:
 
+            print(f"Failed on page {page}.")
+            print(f"Error: {e}")
 
-# ALLOW USER TO LOG IN (REQUIRED) ---------------------------------------------------------------------------------------------------------------------------------------
+# creates the undetected-chromedriver driver which will be used to browse the web
+def start_driver():
+    options = undetected_chromedriver.ChromeOptions()               # sets the options undetected-chromedriver will start with
+
+    options.add_argument("--window-size=1960,1080")                 # makes automation harder to detect (apparently)
 
+    return undetected_chromedriver.Chrome(options=options)
+
+# brings the user to indeed to log in manually, then redirects to computer science jobs in St. Louis, MO once they are done
+def log_in(driver) -> None:
     driver.get("https://www.indeed.com")        # bring the user to indeed (the site to be scraped)
 
     sleep()     # initial sleep while logging in
@@ -127,61 +182,44 @@ if __name__ == "__main__":
     while ("https://www.indeed.com/jobs?q=computer+science&l=St.+Louis%2C+MO" not in driver.current_url):   # additional sleep if needed
         tiny_sleep()
 
+# -----------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# MAIN ===================================================================================================================================================================
+
+if __name__ == "__main__":
+
+# INITIALIZE DRIVER ------------------------------------------------------------------------------------------------------------------------------------------------------
+
+    driver = start_driver()
+
 # ---------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
 
 
 
 
-# SCRAPE EACH JOB (BY CARD) ---------------------------------------------------------------------------------------------------------------------------------------------
+# ALLOW USER TO LOG IN (REQUIRED) ---------------------------------------------------------------------------------------------------------------------------------------
 
-    job_count = 0       # counts number of jobs scraped for debugging purposes
-    seen = set()        # maintains a set of all jobs that have been seen in case duplicates are loaded
+    log_in(driver)
 
-    with open("jobs.jsonl", "w", encoding="UTF-8") as fout:     # opens the jsonl that each job will be written to
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------
 
-        # go through a maximum of MAX_PAGES to ensure non-infinite scraping and that the program will eventually stop if there is a bug
-        for page in range(MAX_PAGES):
 
-            try:
-                # wait for all cards on the screen to load (max 10 seconds), then store them all in cards
-                cards = WebDriverWait(driver, 10).until(expected_conditions.presence_of_all_elements_located((By.CLASS_NAME, "resultContent")))
 
-                for card in cards:
 
-                    # ensure card has not already been seen -- if it has, continue, if not, add it to seen
-                    card_text = card.text
-                    if card_text in seen:
-                        continue
-                    seen.add(card_text)
-
-                    try:
-                        # load the job data by clicking the card and sleep to allow the content to load
-                        card.click()
-                        small_sleep()
-                        
-                        # retrieve the job from the card and dump the attributes of the Job object as a single json object in the jsonl file
-                        json.dump(retrieve_job(driver).__dict__, fout)
-                        fout.write("\n")
-
-                        job_count += 1      # track number of jobs for debugging
-
-                    except Exception as e:
-                        print(f"Failed on page {page}, job {job_count}. Skipped job.")
-                        print(f"Error: {e}")
-
-                # if the next_page element exists and is enabled, go to the next page, else there are no more pages -> break out of loop
-                next_page = driver.find_element(By.XPATH, "//*[contains(@data-testid, 'pagination-page-next')]")
-                if next_page and next_page.is_enabled():
-                    next_page.click()
-                    sleep()     # moderate sleep to allow site to load and lessen site traffic
-                else:
-                    break
-
-            except Exception as e:
-
-                print(f"Failed on page {page}.")
-                print(f"Error: {e}")
+
+# SCRAPE EACH JOB (BY CARD) ---------------------------------------------------------------------------------------------------------------------------------------------
+
+    with open("jobs.jsonl", "w", encoding="UTF-8") as fout:     # opens the jsonl that each job will be written to
+
+        # dump the attributes of each scraped Job object as a single json object in the jsonl file
+        for job in scrape_jobs(driver):
+            json.dump(job.__dict__, fout)
+            fout.write("\n")
 
     driver.quit()
 
@@ -0,0 +1,128 @@
+# OVERVIEW ========================================================================================================================================================================
+'''
+conftest.py provides a FakeDriver that serves the saved Indeed pages in tests/fixtures to scraper.py in place of undetected-chromedriver, so scraper.scrape_jobs() and
+scraper.retrieve_job() run unchanged (including Selenium's WebDriverWait) without a browser or network connection.
+
+The fixture pages are a results page per page of job cards (results_page_<n>.html) and a detail page per job (job_<data-jk>.html). Like on Indeed, clicking a card loads that
+job's details next to the results and clicking the next page button loads the next results page.
+'''
+# =================================================================================================================================================================================
+
+
+
+
+
+# IMPORTS -------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+from selenium.common.exceptions import NoSuchElementException      # raised like a real driver so WebDriverWait keeps waiting / scraper.py's error handling is exercised
+from selenium.webdriver.common.by import By                         # for matching the locators scraper.py uses
+import xml.etree.ElementTree as ElementTree                         # for parsing the fixture pages
+import os, sys, re                                                  # for fixture paths, importing the project modules, and parsing contains() xpaths
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))     # makes the project modules (scraper, pipeline, ...) importable from the tests
+
+import scraper
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# CONSTANT DEFINITIONS ------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# FAKE DRIVER ---------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# finds all elements under root matching one of the locators used by scraper.py (ElementTree supports everything except contains())
+def find_all(root, by: str, value: str) -> list:
+    if by == By.CLASS_NAME:
+        return [element for element in root.iter() if value in element.get("class", "").split()]
+
+    contains = re.fullmatch(r"//\*\[contains\(@([\w-]+), '([^']*)'\)\]", value)
+    if contains:
+        attribute, text = contains.groups()
+        return [element for element in root.iter() if text in element.get(attribute, "")]
+
+    return root.findall(value if value.startswith(".") else "." + value)
+
+# an element of a fixture page that behaves like a Selenium WebElement for the methods scraper.py uses
+class FakeElement:
+
+    def __init__(self, driver, element):
+        self.driver = driver
+        self.element = element
+
+    # the visible text of the element, one line per line of text in the fixture (like Selenium's block elements)
+    @property
+    def text(self) -> str:
+        return "\n".join(line.strip() for line in "".join(self.element.itertext()).splitlines() if line.strip())
+
+    def find_element(self, by: str, value: str):
+        elements = find_all(self.element, by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return FakeElement(self.driver, elements[0])
+
+    def is_enabled(self) -> bool:
+        return self.element.get("disabled") is None
+
+    # clicking a job card shows that job's details and clicking the next page button loads the next results page
+    def click(self) -> None:
+        link = self.element.find(".//a[@data-jk]")
+        if link is not None:
+            self.driver.clicked.append(link.get("data-jk"))
+            self.driver.details = self.driver.load(f"job_{link.get('data-jk')}.html")
+        elif self.element.get("href"):
+            self.driver.results = self.driver.load(self.element.get("href"))
+
+# a driver that serves the fixture pages, starting on results_page_1.html with no job selected
+class FakeDriver:
+
+    def __init__(self, first_page: str = "results_page_1.html"):
+        self.results = self.load(first_page)
+        self.details = None
+        self.clicked = []       # the data-jk of every job card clicked, in order
+
+    def load(self, filename: str):
+        return ElementTree.parse(os.path.join(FIXTURES_DIR, filename)).getroot()
+
+    def find_elements(self, by: str, value: str) -> list[FakeElement]:
+        roots = [self.results] + ([self.details] if self.details is not None else [])
+        return [FakeElement(self, element) for root in roots for element in find_all(root, by, value)]
+
+    def find_element(self, by: str, value: str) -> FakeElement:
+        elements = self.find_elements(by, value)
+        if not elements:
+            raise NoSuchElementException(value)
+        return elements[0]
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# PYTEST FIXTURES -----------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# scraper.py sleeps for seconds between cards and pages to go easy on Indeed, which the fixture pages don't need
+@pytest.fixture(autouse = True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(scraper, "sleep", lambda: None)
+    monkeypatch.setattr(scraper, "small_sleep", lambda: None)
+
+# a new FakeDriver on the first results page
+@pytest.fixture
+def driver():
+    return FakeDriver()
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
@@ -0,0 +1,219 @@
+# OVERVIEW ========================================================================================================================================================================
+'''
+test_pipeline.py runs pipeline.py end to end on the saved Indeed pages in tests/fixtures (served by conftest.py's FakeDriver) with a fake embedder in place of OpenAI, and checks
+the resulting jobs_embeddings.jsonl with resume_comparison.py. Run from the project directory with:
+
+python -m pytest tests
+'''
+# =================================================================================================================================================================================
+
+
+
+
+
+# IMPORTS -------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+import json
+import queue
+import time
+
+import pytest
+
+import pipeline
+import scraper
+from resume_comparison import get_embedded_jobs
+from job.job_module import Job
+from conftest import FakeDriver
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# CONSTANT DEFINITIONS ------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# the jobs in tests/fixtures in the order they are scraped (the repeated card on the second results page is only scraped once)
+FIXTURE_JOBS = [
+    ("a1", "Software Engineer I", "Acme Health"),
+    ("b2", "Data Analyst", "Gateway Logistics"),
+    ("c3", "IT Support Specialist", "Arch Bank"),
+    ("d4", "Junior Web Developer", "River City Media"),
+    ("e5", "Machine Learning Intern", "Midwest Ag Labs"),
+]
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# HELPERS -------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+# an embedder that turns each description into a small vector instead of calling OpenAI and remembers every batch it was given
+class FakeEmbedder:
+
+    def __init__(self, fail_on: tuple[int] = (), failure: str = "raise"):
+        self.calls = []             # every batch of descriptions received, in order
+        self.fail_on = fail_on      # the indexes of the calls that should fail
+        self.failure = failure      # "raise" to raise an error or "short" to return one embedding too few
+
+    # the embedding given to a description (static so tests can work out expected embeddings without adding to calls)
+    @staticmethod
+    def vector(description: str) -> list[float]:
+        return [float(len(description)), float(description.count("Python")), 1.0]
+
+    def __call__(self, descriptions: list[str]) -> list[list[float]]:
+        self.calls.append(descriptions)
+        embeddings = [FakeEmbedder.vector(description) for description in descriptions]
+
+        if len(self.calls) - 1 in self.fail_on:
+            if self.failure == "raise":
+                raise RuntimeError("rate limit reached")
+            return embeddings[:-1]
+
+        return embeddings
+
+    # every description received, in order
+    def descriptions(self) -> list[str]:
+        return [description for batch in self.calls for description in batch]
+
+# runs the pipeline on the fixture pages (or with scrape if one is given) with the settings shrunk so the tests finish quickly and returns every job indexed
+def run(driver, embedder, tmp_path, scrape = None) -> list:
+    store = []
+
+    num_indexed = pipeline.run_pipeline(
+        scrape or (lambda known, stop: scraper.scrape_jobs(driver, 5, known, stop)),
+        embedder,
+        scraped_path = str(tmp_path / "scraped_jobs.jsonl"),
+        embeddings_path = str(tmp_path / "jobs_embeddings.jsonl"),
+        queue_size = 2,
+        batch_size = 2,
+        batch_wait = 1,
+        batch_delay = 0,
+        report_interval = 5,
+        on_index = store.append
+    )
+
+    assert num_indexed == len(store)
+    return store
+
+# reads every line of a jsonl file, failing the test if any line is not valid json
+def read_lines(path) -> list[dict]:
+    with open(path, "r", encoding = "utf-8") as fin:
+        return [json.loads(line) for line in fin]
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+
+
+
+
+# TESTS ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------
+
+def test_pipeline_scrapes_embeds_and_indexes_fixture_jobs(driver, tmp_path):
+    embedder = FakeEmbedder()
+
+    store = run(driver, embedder, tmp_path)
+
+    assert driver.clicked == [jk for jk, _, _ in FIXTURE_JOBS]
+    assert [(job.title, job.company) for job in store] == [(title, company) for _, title, company in FIXTURE_JOBS]
+    assert store[0].location == "St. Louis, MO"
+    assert store[0].full_description == "Build and maintain Python services for our patient portal.\nRequirements:\nBS in Computer Science\nExperience with Python and SQL"
+    assert store[0].embedding == FakeEmbedder.vector(store[0].full_description)
+    assert embedder.descriptions() == [job.full_description for job in store]
+
+    assert len(read_lines(tmp_path / "scraped_jobs.jsonl")) == len(FIXTURE_JOBS)
+    embedded_jobs = get_embedded_jobs(str(tmp_path / "jobs_embeddings.jsonl"))
+    assert [(job.title, job.embedding) for job in embedded_jobs] == [(job.title, job.embedding) for job in store]
+
+def test_pipeline_resumes_after_crash(tmp_path):
+    run(FakeDriver(), FakeEmbedder(), tmp_path)
+
+    # simulate a crash while the fifth job was being scraped and the third embedding was being written
+    scraped_lines = (tmp_path / "scraped_jobs.jsonl").read_text(encoding = "utf-8").splitlines(keepends = True)
+    (tmp_path / "scraped_jobs.jsonl").write_text("".join(scraped_lines[:4]) + scraped_lines[4][:40], encoding = "utf-8")
+    embedding_lines = (tmp_path / "jobs_embeddings.jsonl").read_text(encoding = "utf-8").splitlines(keepends = True)
+    (tmp_path / "jobs_embeddings.jsonl").write_text("".join(embedding_lines[:2]) + embedding_lines[2][:60], encoding = "utf-8")
+
+    driver = FakeDriver()
+    embedder = FakeEmbedder()
+    store = run(driver, embedder, tmp_path)
+
+    # only the job that was never scraped is clicked and only the jobs that were never embedded are embedded
+    assert driver.clicked == ["e5"]
+    assert [job.title for job in store] == [title for _, title, _ in FIXTURE_JOBS[2:]]
+    assert embedder.descriptions() == [job.full_description for job in store]
+
+    # both files are valid jsonl again, so resume_comparison.py can read the embeddings
+    assert [job['title'] for job in read_lines(tmp_path / "scraped_jobs.jsonl")] == [title for _, title, _ in FIXTURE_JOBS]
+    assert [job.title for job in get_embedded_jobs(str(tmp_path / "jobs_embeddings.jsonl"))] == [title for _, title, _ in FIXTURE_JOBS]
+
+def test_pipeline_embeds_jobs_scraped_before_scraper_fails(tmp_path):
+    # a scraper that gets one job and then crashes (e.g. the browser was closed)
+    def scrape(known, stop):
+        yield from scraper.scrape_jobs(FakeDriver(), 1, known, stop)
+        raise RuntimeError("browser closed")
+
+    store = run(None, FakeEmbedder(), tmp_path, scrape)
+
+    assert [job.title for job in store] == [title for _, title, _ in FIXTURE_JOBS[:3]]
+    assert len(get_embedded_jobs(str(tmp_path / "jobs_embeddings.jsonl"))) == 3
+
+def test_report_does_not_count_done_as_a_waiting_job(capsys):
+    scraped_queue = queue.Queue(maxsize = 2)
+    scraped_queue.put(Job("Data Analyst", "Gateway Logistics", "Chesterfield, MO", "Turn shipping data into dashboards."))
+    scraped_queue.put(pipeline.DONE)
+
+    pipeline.report([pipeline.StageStats("scrape")], {"scraped": scraped_queue})
+
+    assert capsys.readouterr().out.strip().endswith("scraped queue: 1/2")
+
+def test_scraping_waits_for_slow_embedding(tmp_path):
+    produced = 0    # the number of jobs the scraper has produced so far
+
+    # a scraper that could produce jobs much faster than they are embedded
+    def scrape(known, stop):
+        nonlocal produced
+        for i in range(20):
+            produced += 1
+            yield Job(f"Software Engineer {i}", "Acme Health", "St. Louis, MO", f"Build Python services for team {i}.")
+
+    outstanding = []    # the number of jobs produced but not yet sent to be embedded when each embedding request starts
+
+    class SlowEmbedder(FakeEmbedder):
+        def __call__(self, descriptions: list[str]) -> list[list[float]]:
+            outstanding.append(produced - len(self.descriptions()))
+            time.sleep(0.05)
+            return super().__call__(descriptions)
+
+    store = run(None, SlowEmbedder(), tmp_path, scrape)
+
+    # at most a full scraped queue (2), the batch being embedded (2), and the job the scrape stage is waiting to queue (1) are ever ahead of embedding
+    assert len(store) == 20
+    assert max(outstanding) <= 2 + 2 + 1
+
+@pytest.mark.parametrize("failure", ["raise", "short"])
+def test_pipeline_retries_failed_batch_on_next_run(tmp_path, capsys, failure):
+    failing_embedder = FakeEmbedder(fail_on = (0,), failure = failure)
+    store = run(FakeDriver(), failing_embedder, tmp_path)
+
+    # the failed batch is counted as failed, not embedded, and nothing from it is stored
+    failed = failing_embedder.calls[0]
+    assert len(store) == len(FIXTURE_JOBS) - len(failed)
+    assert not {job.full_description for job in store} & set(failed)
+    report = capsys.readouterr().out
+    assert f"embed: {len(store)} jobs" in report
+    assert f"{len(failed)} failed" in report
+    assert len(get_embedded_jobs(str(tmp_path / "jobs_embeddings.jsonl"))) == len(store)
+
+    # the next run embeds only the failed jobs without scraping anything again
+    driver = FakeDriver()
+    embedder = FakeEmbedder()
+    store = run(driver, embedder, tmp_path)
+
+    assert driver.clicked == []
+    assert embedder.descriptions() == failed
+    assert sorted(job.title for job in get_embedded_jobs(str(tmp_path / "jobs_embeddings.jsonl"))) == sorted(title for _, title, _ in FIXTURE_JOBS)
+
+# ---------------------------------------------------------------------------------------------------------------------------------------------------------------------------------